@@ -5,150 +5,359 @@ Connects to Binance WebSocket API to stream live BTC/USDT trading data
 """
 
 import websocket
-import json
 import threading
+import queue
 import time
+import os
 from datetime import datetime
-from collections import OrderedDict
-from enum import Enum
-from dataclasses import dataclass
-from typing import Optional, List
+from collections import deque
+from itertools import islice
+from operator import mul
+from typing import Optional, Deque
 import sys
 
+from sortedcontainers import SortedDict
 
-class Side(Enum):
-    BUY = "Buy"
-    SELL = "Sell"
+try:
+    import msgspec
+except ImportError:  # msgspec is CPython-only; fall back to json (e.g. PyPy)
+    msgspec = None
+    import json
+
+# Prices are stored as integer ticks of 0.01 (price * PRICE_SCALE)
+PRICE_DECIMALS = 2
+PRICE_SCALE = 10 ** PRICE_DECIMALS
+# Quantities are stored as integer units of 0.001
+QUANTITY_DECIMALS = 3
+
+
+def parse_fixed(text: str, decimals: int, round_half_up: bool = False) -> int:
+    """Parse a decimal string into an integer scaled by 10**decimals, truncating or rounding half-up extra digits"""
+    whole, _, fraction = text.partition(".")
+    value = int(whole + fraction[:decimals].ljust(decimals, "0"))
+    if round_half_up and fraction[decimals:decimals + 1] >= "5":
+        value += 1
+    return value
+
+
+if msgspec is not None:
+    class AggTrade(msgspec.Struct):
+        """Fields of a Binance aggTrade event used by the order book"""
+        p: str   # Price
+        q: str   # Quantity
+        m: bool  # Buyer is the market maker (seller-initiated trade)
+        a: int   # Aggregate trade ID
+
+    # Decodes aggTrade frames straight into AggTrade, ignoring unused fields
+    AGG_TRADE_DECODER = msgspec.json.Decoder(AggTrade)
+
+    def decode_agg_trade(message):
+        """Decode an aggTrade frame into (price, quantity, is_sell, trade_id)"""
+        trade = AGG_TRADE_DECODER.decode(message)
+        return trade.p, trade.q, trade.m, trade.a
+
+    # ValidationError subclasses DecodeError, so it must be caught first
+    INVALID_TRADE_ERRORS = (msgspec.ValidationError,)
+    TRADE_DECODE_ERRORS = (msgspec.DecodeError, UnicodeDecodeError)
+else:
+    def decode_agg_trade(message):
+        """Decode an aggTrade frame into (price, quantity, is_sell, trade_id)"""
+        data = json.loads(message)
+        return data["p"], data["q"], bool(data["m"]), int(data["a"])
+
+    INVALID_TRADE_ERRORS = (KeyError,)
+    TRADE_DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
 
 
-@dataclass
 class Order:
-    id: int
-    price: float
-    quantity: int
-    side: Side
-    entry_time: float
-
-    def __init__(self, order_id: int, price: float, quantity: int, side: Side):
-        self.id = order_id
-        self.price = price
-        self.quantity = quantity
-        self.side = side
-        self.entry_time = time.perf_counter()
+    # Slotted: no per-instance __dict__, smaller orders and faster attribute access
+    __slots__ = ("id", "price", "quantity", "is_buy")
+
+    def __init__(self, order_id: int, price: int, quantity: int, is_buy: bool):
+        self.id: int = order_id
+        self.price: int = price  # Ticks
+        self.quantity: int = quantity
+        self.is_buy: bool = is_buy
+
+    def __repr__(self) -> str:
+        return (f"Order(id={self.id}, price={self.price}, quantity={self.quantity}, "
+                f"is_buy={self.is_buy})")
+
+
+class OrderPool:
+    """Bounded free-list of Order objects reused across messages"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._free: Deque[Order] = deque()
+
+    def acquire(self, order_id: int, price: int, quantity: int, is_buy: bool) -> Order:
+        """Return a pooled order reset to the given fields, or a new one"""
+        if not self._free:
+            return Order(order_id, price, quantity, is_buy)
+        order = self._free.pop()
+        order.id = order_id
+        order.price = price
+        order.quantity = quantity
+        order.is_buy = is_buy
+        return order
+
+    def release(self, order: Order):
+        """Return a fully filled order to the pool"""
+        if len(self._free) < self.max_size:
+            self._free.append(order)
+
+    def release_all(self, orders):
+        """Return a batch of fully filled orders to the pool"""
+        room = self.max_size - len(self._free)
+        if room > 0:
+            self._free.extend(islice(orders, room))
 
 
 class LimitLevel:
-    def __init__(self, price: float):
+    def __init__(self, price: int):
         self.price = price
         self.total_volume = 0
-        self.orders: List[Order] = []
+        self.orders: Deque[Order] = deque()
 
 
 class OrderBook:
+    # Number of most recent fills kept for the rolling VWAP
+    TRADE_WINDOW = 32
+    # Time one in every 256 submissions (message count & mask == 0)
+    TIMING_SAMPLE_MASK = 0xFF
+
     def __init__(self):
+        # Not locked: only the single processing thread mutates the book
         # Bids: descending order (highest first)
-        self.bids: OrderedDict[float, LimitLevel] = OrderedDict()
+        self.bids: SortedDict = SortedDict(lambda price: -price)
         # Asks: ascending order (lowest first)
-        self.asks: OrderedDict[float, LimitLevel] = OrderedDict()
-        self.lock = threading.Lock()
+        self.asks: SortedDict = SortedDict()
+        # Cached top-of-book levels, kept in sync on every insert and removal
+        self.best_bid: Optional[LimitLevel] = None
+        self.best_ask: Optional[LimitLevel] = None
+        self.order_pool = OrderPool()
         
-        self.last_trade_price = 0.0
+        # Prices and notional are kept in integer ticks (see PRICE_SCALE)
+        self.last_trade_price = 0
         self.total_volume_traded = 0
-        self.cumulative_notional = 0.0
+        self.cumulative_notional = 0
         
-        # Timing statistics
+        # Fixed-size ring buffer of recent fills, one entry per price level
+        # crossed by an aggressor (parallel price/qty arrays)
+        self.trade_prices = [0] * self.TRADE_WINDOW
+        self.trade_quantities = [0] * self.TRADE_WINDOW
+        self.trade_index = 0
+        
+        # Timing statistics (processing time covers sampled messages only)
         self.total_messages_processed = 0
+        self.timed_messages = 0
         self.total_processing_time = 0.0
 
     def submit_order(self, order: Order):
-        start_time = time.perf_counter()
+        timed = not (self.total_messages_processed & self.TIMING_SAMPLE_MASK)
+        if timed:
+            start_time = time.perf_counter()
         
-        with self.lock:
-            if order.side == Side.BUY:
-                self._match_order(order, self.asks)
-                if order.quantity > 0:
-                    self._add_limit(order, self.bids)
+        if order.is_buy:
+            self._match_buy_against_asks(order)
+            if order.quantity > 0:
+                level = self._add_limit(order, self.bids)
+                if self.best_bid is None or level.price > self.best_bid.price:
+                    self.best_bid = level
+            else:
+                self.order_pool.release(order)
+        else:
+            self._match_sell_against_bids(order)
+            if order.quantity > 0:
+                level = self._add_limit(order, self.asks)
+                if self.best_ask is None or level.price < self.best_ask.price:
+                    self.best_ask = level
             else:
-                self._match_order(order, self.bids)
-                if order.quantity > 0:
-                    self._add_limit(order, self.asks)
+                self.order_pool.release(order)
         
-        processing_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
+        if timed:
+            processing_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
+            self.timed_messages += 1
+            self.total_processing_time += processing_time
         self.total_messages_processed += 1
-        self.total_processing_time += processing_time
 
-    def _match_order(self, order: Order, opposite_side: OrderedDict):
-        """Match order against opposite side of the book"""
-        prices_to_remove = []
+    def _match_buy_against_asks(self, order: Order):
+        """Match buy order against asks, lowest price first"""
+        level = self.best_ask
+        limit_price = order.price
         
-        for price, level in list(opposite_side.items()):
-            if order.quantity == 0:
-                break
-                
-            # Check if order can match at this price level
-            can_match = (order.side == Side.BUY and order.price >= price) or \
-                       (order.side == Side.SELL and order.price <= price)
+        # Nothing to match: empty quantity, empty side or no price cross
+        if order.quantity == 0 or level is None or level.price > limit_price:
+            return
+        
+        opposite_side = self.asks
+        order_pool = self.order_pool
+        
+        # Accumulate into locals and write the book's statistics back once
+        qty = order.quantity
+        volume = 0
+        notional = 0
+        trade_prices = self.trade_prices
+        trade_quantities = self.trade_quantities
+        trade_index = self.trade_index
+        trade_window = self.TRADE_WINDOW
+        
+        while True:
+            price = level.price
+            orders = level.orders
+            level_volume = level.total_volume
             
-            if not can_match:
-                break
+            # Sweep: the whole level fills, otherwise the rest of qty fills here
+            traded_qty = level_volume if qty >= level_volume else qty
+            qty -= traded_qty
+            volume += traded_qty
+            notional += traded_qty * price
+            trade_prices[trade_index] = price
+            trade_quantities[trade_index] = traded_qty
+            trade_index = (trade_index + 1) % trade_window
             
-            # Match against orders at this level
-            orders_to_remove = []
-            for existing_order in level.orders:
-                if order.quantity == 0:
-                    break
-                    
-                traded_qty = min(order.quantity, existing_order.quantity)
-                self.last_trade_price = price
-                self.total_volume_traded += traded_qty
-                self.cumulative_notional += (traded_qty * price)
-                
-                order.quantity -= traded_qty
-                existing_order.quantity -= traded_qty
-                level.total_volume -= traded_qty
+            if traded_qty == level_volume:
+                level.total_volume = 0
+                order_pool.release_all(orders)
+                orders.clear()
                 
-                if existing_order.quantity == 0:
-                    orders_to_remove.append(existing_order)
+                # Drop the emptied best level and advance to the next one
+                opposite_side.popitem(0)
+                level = opposite_side.peekitem(0)[1] if opposite_side else None
+                # A buy only crosses asks priced at or below its limit
+                if qty == 0 or level is None or level.price > limit_price:
+                    break
+                continue
+            
+            # Partial level fill: pop head orders that fill completely, then
+            # take the remainder off the new head. traded_qty < level_volume,
+            # so the level never runs out of orders here
+            level.total_volume = level_volume - traded_qty
+            front = orders[0]
+            while front.quantity <= traded_qty:
+                traded_qty -= front.quantity
+                order_pool.release(orders.popleft())
+                front = orders[0]
+            front.quantity -= traded_qty
+            break
+        
+        self.best_ask = level
+        order.quantity = qty
+        self.total_volume_traded += volume
+        self.cumulative_notional += notional
+        self.last_trade_price = price
+        self.trade_index = trade_index
+
+    def _match_sell_against_bids(self, order: Order):
+        """Match sell order against bids, highest price first"""
+        level = self.best_bid
+        limit_price = order.price
+        
+        # Nothing to match: empty quantity, empty side or no price cross
+        if order.quantity == 0 or level is None or level.price < limit_price:
+            return
+        
+        opposite_side = self.bids
+        order_pool = self.order_pool
+        
+        # Accumulate into locals and write the book's statistics back once
+        qty = order.quantity
+        volume = 0
+        notional = 0
+        trade_prices = self.trade_prices
+        trade_quantities = self.trade_quantities
+        trade_index = self.trade_index
+        trade_window = self.TRADE_WINDOW
+        
+        while True:
+            price = level.price
+            orders = level.orders
+            level_volume = level.total_volume
+            
+            # Sweep: the whole level fills, otherwise the rest of qty fills here
+            traded_qty = level_volume if qty >= level_volume else qty
+            qty -= traded_qty
+            volume += traded_qty
+            notional += traded_qty * price
+            trade_prices[trade_index] = price
+            trade_quantities[trade_index] = traded_qty
+            trade_index = (trade_index + 1) % trade_window
             
-            # Remove filled orders
-            for o in orders_to_remove:
-                level.orders.remove(o)
+            if traded_qty == level_volume:
+                level.total_volume = 0
+                order_pool.release_all(orders)
+                orders.clear()
+                
+                # Drop the emptied best level and advance to the next one
+                opposite_side.popitem(0)
+                level = opposite_side.peekitem(0)[1] if opposite_side else None
+                # A sell only crosses bids priced at or above its limit
+                if qty == 0 or level is None or level.price < limit_price:
+                    break
+                continue
             
-            # Remove empty levels
-            if len(level.orders) == 0:
-                prices_to_remove.append(price)
+            # Partial level fill: pop head orders that fill completely, then
+            # take the remainder off the new head. traded_qty < level_volume,
+            # so the level never runs out of orders here
+            level.total_volume = level_volume - traded_qty
+            front = orders[0]
+            while front.quantity <= traded_qty:
+                traded_qty -= front.quantity
+                order_pool.release(orders.popleft())
+                front = orders[0]
+            front.quantity -= traded_qty
+            break
         
-        # Remove empty price levels
-        for price in prices_to_remove:
-            del opposite_side[price]
-
-    def _add_limit(self, order: Order, side_map: OrderedDict):
-        """Add order to limit order book"""
-        if order.price not in side_map:
-            side_map[order.price] = LimitLevel(order.price)
+        self.best_bid = level
+        order.quantity = qty
+        self.total_volume_traded += volume
+        self.cumulative_notional += notional
+        self.last_trade_price = price
+        self.trade_index = trade_index
+
+    def _add_limit(self, order: Order, side_map: SortedDict) -> LimitLevel:
+        """Add order to limit order book and return its price level"""
+        level = side_map.get(order.price)
+        if level is None:
+            level = side_map[order.price] = LimitLevel(order.price)
         
-        level = side_map[order.price]
         level.total_volume += order.quantity
         level.orders.append(order)
+        return level
 
     def display_metrics(self):
         """Display order book metrics with timing information"""
-        with self.lock:
-            vwap = (self.cumulative_notional / self.total_volume_traded 
-                   if self.total_volume_traded > 0 else 0.0)
-            
-            avg_processing_time = (self.total_processing_time / self.total_messages_processed 
-                                 if self.total_messages_processed > 0 else 0.0)
-            
-            current_time = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            
-            print(f"\r[{current_time}] [LOB] Last: {self.last_trade_price:.2f} | "
-                  f"VWAP: {vwap:.2f} | Vol: {self.total_volume_traded} | "
-                  f"Msg: {self.total_messages_processed} | "
-                  f"AvgProc: {avg_processing_time:.3f}ms", end='', flush=True)
+        # Convert ticks back to prices only for display
+        vwap = (self.cumulative_notional / (self.total_volume_traded * PRICE_SCALE)
+               if self.total_volume_traded > 0 else 0.0)
+        
+        window_volume = sum(self.trade_quantities)
+        rolling_vwap = (sum(map(mul, self.trade_prices, self.trade_quantities)) / (window_volume * PRICE_SCALE)
+                        if window_volume > 0 else 0.0)
+        
+        avg_processing_time = (self.total_processing_time / self.timed_messages 
+                             if self.timed_messages > 0 else 0.0)
+        
+        now = datetime.now()
+        
+        # Format the whole line as bytes in one C-level % and write it
+        # straight to fd 1, bypassing print and the text buffer
+        line = (b"\r[%02d:%02d:%02d.%03d] [LOB] Last: %.2f | VWAP: %.2f | RollVWAP: %.2f | "
+                b"Vol: %d | Msg: %d | AvgProc: %.3fms") % (
+            now.hour, now.minute, now.second, now.microsecond // 1000,
+            self.last_trade_price / PRICE_SCALE, vwap, rolling_vwap,
+            self.total_volume_traded, self.total_messages_processed, avg_processing_time)
+        
+        # Keep ordering with any buffered print() output
+        sys.stdout.flush()
+        os.write(1, line)
 
 
 class BinanceWebSocketClient:
+    # Minimum seconds between metrics refreshes (~10 Hz)
+    METRICS_INTERVAL = 0.1
+
     def __init__(self, symbol: str = "btcusdt"):
         self.symbol = symbol.lower()
         self.url = f"wss://stream.binance.com:443/ws/{self.symbol}@aggTrade"
@@ -156,53 +365,88 @@ class BinanceWebSocketClient:
         self.order_book = OrderBook()
         self.connection_start_time: Optional[float] = None
         self.first_message_time: Optional[float] = None
+        # Parsed trades handed off from the WebSocket reader to the processor
+        self._trade_q: queue.SimpleQueue = queue.SimpleQueue()
+        self._processor: Optional[threading.Thread] = None
         
     def on_message(self, ws, message):
-        """Handle incoming WebSocket messages"""
+        """Handle incoming WebSocket messages (parse and enqueue only)"""
         if self.first_message_time is None:
             self.first_message_time = time.perf_counter()
             connection_time = (self.first_message_time - self.connection_start_time) * 1000
             print(f"\n[INFO] First message received in {connection_time:.2f}ms")
         
-        message_start = time.perf_counter()
-        
         try:
-            data = json.loads(message)
+            # Decode and validate required fields in one pass
+            price_text, quantity_text, is_sell, trade_id = decode_agg_trade(message)
             
-            # Validate required fields
-            if not all(key in data for key in ["p", "q", "m", "a"]):
-                print(f"\n[WARNING] Missing required fields in message: {data}")
-                return
+            # Scale straight from the decimal strings, no float round-trip.
+            # Prices round to the nearest tick; quantities keep the original
+            # truncation to 0.001 units
+            price = parse_fixed(price_text, PRICE_DECIMALS, round_half_up=True)
+            quantity = parse_fixed(quantity_text, QUANTITY_DECIMALS)
             
-            # Parse trade data
-            price = float(data["p"])
-            quantity = float(data["q"])
-            is_sell = bool(data["m"])
-            trade_id = int(data["a"])
+            # Hand off to the processing thread
+            self._trade_q.put((price, quantity, is_sell, trade_id))
             
-            # Create order
-            order = Order(
-                order_id=trade_id,
-                price=price,
-                quantity=int(quantity * 1000),  # Scale for integer qty
-                side=Side.SELL if is_sell else Side.BUY
-            )
-            
-            # Process order
-            self.order_book.submit_order(order)
-            self.order_book.display_metrics()
-            
-            message_time = (time.perf_counter() - message_start) * 1000
-            # Optionally log per-message timing (commented out to reduce noise)
-            # print(f" | MsgProc: {message_time:.3f}ms", end='')
-            
-        except json.JSONDecodeError as e:
+        except INVALID_TRADE_ERRORS as e:
+            print(f"\n[WARNING] Invalid trade message: {e}")
+        except TRADE_DECODE_ERRORS as e:
             print(f"\n[ERROR] JSON decode error: {e}")
-        except KeyError as e:
-            print(f"\n[ERROR] Missing key in message: {e}")
         except Exception as e:
             print(f"\n[ERROR] Error processing message: {e}")
 
+    def _process_trades(self):
+        """Consume parsed trades in batches and update the order book (single writer)"""
+        order_book = self.order_book
+        submit_order = order_book.submit_order
+        acquire = order_book.order_pool.acquire
+        get_trade = self._trade_q.get
+        get_trade_nowait = self._trade_q.get_nowait
+        perf_counter = time.perf_counter
+        metrics_interval = self.METRICS_INTERVAL
+        last_display = 0.0
+        display_enabled = True
+        
+        # Set when the book changed since the last redraw
+        undisplayed = False
+        
+        while True:
+            # Block for the next trade, then drain everything already queued.
+            # Wake up after a quiet interval to redraw trades that were
+            # applied too soon after the previous redraw to be shown
+            try:
+                batch = [get_trade(timeout=metrics_interval)]
+            except queue.Empty:
+                batch = None
+            
+            if batch is not None:
+                try:
+                    while True:
+                        batch.append(get_trade_nowait())
+                except queue.Empty:
+                    pass
+                
+                for price, quantity, is_sell, trade_id in batch:
+                    try:
+                        # Create order (reusing a pooled instance when available)
+                        submit_order(acquire(trade_id, price, quantity, not is_sell))
+                    except Exception as e:
+                        print(f"\n[ERROR] Error processing trade: {e}")
+                undisplayed = True
+            
+            # Throttle stdout so printing stays off the per-trade path
+            now = perf_counter()
+            if display_enabled and undisplayed and now - last_display >= metrics_interval:
+                try:
+                    order_book.display_metrics()
+                except OSError as e:
+                    # stdout is gone (e.g. a closed pipe); keep matching without metrics
+                    display_enabled = False
+                    sys.stderr.write(f"\n[WARNING] Metrics display disabled: {e}\n")
+                last_display = now
+                undisplayed = False
+
     def on_error(self, ws, error):
         """Handle WebSocket errors"""
         current_time = datetime.now().strftime("%H:%M:%S.%f")[:-3]
@@ -213,8 +457,8 @@ class BinanceWebSocketClient:
         current_time = datetime.now().strftime("%H:%M:%S.%f")[:-3]
         duration = time.perf_counter() - self.connection_start_time if self.connection_start_time else 0
         msgs_per_sec = self.order_book.total_messages_processed / duration if duration > 0 else 0
-        avg_proc_time = (self.order_book.total_processing_time / self.order_book.total_messages_processed 
-                        if self.order_book.total_messages_processed > 0 else 0)
+        avg_proc_time = (self.order_book.total_processing_time / self.order_book.timed_messages 
+                        if self.order_book.timed_messages > 0 else 0)
         
         print(f"\n[{current_time}] [INFO] WebSocket connection closed")
         print(f"[INFO] Connection duration: {duration:.2f} seconds")
@@ -236,6 +480,10 @@ class BinanceWebSocketClient:
         
         self.connection_start_time = time.perf_counter()
         
+        # Book updates run on a dedicated thread so they overlap with socket reads
+        self._processor = threading.Thread(target=self._process_trades, name="OrderBookProcessor", daemon=True)
+        self._processor.start()
+        
         self.ws = websocket.WebSocketApp(
             self.url,
             on_message=self.on_message,
@@ -244,8 +492,16 @@ class BinanceWebSocketClient:
             on_open=self.on_open
         )
         
-        # Run forever
-        self.ws.run_forever(sslopt={"cert_reqs": 0})
+        # The socket is read on this thread; name it for observability
+        threading.current_thread().name = "WSReader"
+        
+        # Run forever. With UTF-8 validation skipped, text frames reach
+        # on_message as raw bytes; the JSON decoder validates the UTF-8
+        # while parsing, so websocket-client's separate pass is redundant.
+        # Client pings every 20s (on websocket-client's ping thread) detect a
+        # half-open connection: no pong within 10s closes the socket
+        self.ws.run_forever(sslopt={"cert_reqs": 0}, ping_interval=20, ping_timeout=10,
+                            skip_utf8_validation=True)
 
 
 def main():
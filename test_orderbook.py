@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for the Python OrderBook in main.py
+Ports the matching cases from orderbook_test.go / test_orderbook.cpp and
+checks the book's internal invariants after every submission
+"""
+
+import random
+import unittest
+
+from main import OrderBook, PRICE_SCALE, parse_fixed
+
+
+def ticks(price: float) -> int:
+    return int(round(price * PRICE_SCALE))
+
+
+class OrderBookTest(unittest.TestCase):
+    def setUp(self):
+        self.ob = OrderBook()
+        self.next_id = 1
+
+    def submit(self, price: float, quantity: int, is_buy: bool):
+        order = self.ob.order_pool.acquire(self.next_id, ticks(price), quantity, is_buy)
+        self.next_id += 1
+        self.ob.submit_order(order)
+        self.assert_book_consistent()
+
+    def vwap(self) -> float:
+        ob = self.ob
+        return ob.cumulative_notional / (ob.total_volume_traded * PRICE_SCALE) if ob.total_volume_traded else 0.0
+
+    def resting(self, side) -> dict:
+        """Map of price -> resting quantities in FIFO order"""
+        return {price / PRICE_SCALE: [o.quantity for o in level.orders] for price, level in side.items()}
+
+    def assert_book_consistent(self):
+        ob = self.ob
+        resting_ids = set()
+        for side, best in ((ob.bids, ob.best_bid), (ob.asks, ob.best_ask)):
+            # Cached best level is the top of the sorted side
+            if side:
+                self.assertIs(best, side.peekitem(0)[1])
+            else:
+                self.assertIsNone(best)
+            for price, level in side.items():
+                self.assertEqual(price, level.price)
+                self.assertTrue(level.orders, "empty price level left in the book")
+                self.assertEqual(level.total_volume, sum(o.quantity for o in level.orders))
+                for o in level.orders:
+                    self.assertGreater(o.quantity, 0)
+                    resting_ids.add(id(o))
+        # Book must not be crossed
+        if ob.best_bid is not None and ob.best_ask is not None:
+            self.assertLess(ob.best_bid.price, ob.best_ask.price)
+        # A pooled order must never still be resting, nor be pooled twice
+        pooled_ids = [id(o) for o in ob.order_pool._free]
+        self.assertEqual(len(pooled_ids), len(set(pooled_ids)))
+        self.assertFalse(resting_ids & set(pooled_ids), "pooled order still resting in the book")
+
+    def test_initial_state(self):
+        self.assertEqual(self.ob.last_trade_price, 0)
+        self.assertEqual(self.ob.total_volume_traded, 0)
+        self.assertEqual(self.vwap(), 0.0)
+        self.assertIsNone(self.ob.best_bid)
+        self.assertIsNone(self.ob.best_ask)
+
+    def test_no_match(self):
+        self.submit(100.0, 1000, True)
+        self.submit(101.0, 500, False)
+        self.assertEqual(self.ob.total_volume_traded, 0)
+        self.assertEqual(self.ob.best_bid.price, ticks(100.0))
+        self.assertEqual(self.ob.best_ask.price, ticks(101.0))
+
+    def test_exact_match(self):
+        self.submit(100.0, 500, True)
+        self.submit(99.0, 500, False)
+        self.assertEqual(self.ob.last_trade_price, ticks(100.0))
+        self.assertEqual(self.ob.total_volume_traded, 500)
+        self.assertFalse(self.ob.bids)
+        self.assertFalse(self.ob.asks)
+        self.assertEqual(len(self.ob.order_pool._free), 2)
+
+    def test_partial_match(self):
+        self.submit(100.0, 1000, True)
+        self.submit(99.0, 300, False)
+        self.assertEqual(self.ob.last_trade_price, ticks(100.0))
+        self.assertEqual(self.ob.total_volume_traded, 300)
+        self.assertAlmostEqual(self.vwap(), 100.0)
+        self.assertEqual(self.resting(self.ob.bids), {100.0: [700]})
+
+    def test_multiple_matches_sweep(self):
+        self.submit(101.0, 500, True)
+        self.submit(100.0, 500, True)
+        self.submit(99.0, 800, False)
+        # 500 at 101.0 sweeps the best level, 300 at 100.0 fills partially
+        self.assertEqual(self.ob.last_trade_price, ticks(100.0))
+        self.assertEqual(self.ob.total_volume_traded, 800)
+        self.assertAlmostEqual(self.vwap(), (500 * 101.0 + 300 * 100.0) / 800)
+        self.assertEqual(self.resting(self.ob.bids), {100.0: [200]})
+        self.assertIs(self.ob.best_bid, self.ob.bids[ticks(100.0)])
+
+    def test_sweep_leaves_remainder_resting(self):
+        self.submit(100.0, 200, False)
+        self.submit(101.0, 300, False)
+        self.submit(102.0, 600, True)
+        self.assertEqual(self.ob.total_volume_traded, 500)
+        self.assertFalse(self.ob.asks)
+        self.assertEqual(self.resting(self.ob.bids), {102.0: [100]})
+        self.assertEqual(self.ob.best_bid.price, ticks(102.0))
+
+    def test_price_priority(self):
+        # Better price arriving later must still match first
+        self.submit(100.0, 500, True)
+        self.submit(101.0, 500, True)
+        self.submit(99.0, 300, False)
+        self.assertEqual(self.ob.last_trade_price, ticks(101.0))
+        self.assertEqual(self.resting(self.ob.bids), {101.0: [200], 100.0: [500]})
+
+    def test_time_priority_within_level(self):
+        self.submit(100.0, 500, True)
+        self.submit(100.0, 300, True)
+        self.submit(100.0, 200, True)
+        # Fills the first order, then part of the second, head-only
+        self.submit(99.0, 600, False)
+        self.assertEqual(self.resting(self.ob.bids), {100.0: [200, 200]})
+        self.submit(99.0, 400, False)
+        self.assertEqual(self.ob.total_volume_traded, 1000)
+        self.assertFalse(self.ob.bids)
+
+    def test_zero_quantity(self):
+        self.submit(100.0, 500, False)
+        self.submit(101.0, 0, True)
+        self.assertEqual(self.ob.total_volume_traded, 0)
+        self.assertEqual(self.ob.last_trade_price, 0)
+        self.assertFalse(self.ob.bids)
+        self.assertEqual(self.resting(self.ob.asks), {100.0: [500]})
+
+    def test_pooled_orders_are_reused(self):
+        self.submit(100.0, 500, False)
+        self.submit(100.0, 500, True)
+        freed = list(self.ob.order_pool._free)
+        order = self.ob.order_pool.acquire(99, ticks(98.0), 7, False)
+        self.assertIn(order, freed)
+        self.assertEqual((order.id, order.price, order.quantity, order.is_buy), (99, ticks(98.0), 7, False))
+
+    def test_rolling_vwap_window(self):
+        window = OrderBook.TRADE_WINDOW
+        for i in range(window + 8):
+            self.submit(100.0 + i, 2, False)
+            self.submit(200.0, 1, True)
+        # Each buy lifts one unit off the lowest ask; asks fill two per level
+        prices = [100.0 + i // 2 for i in range(window + 8)][-window:]
+        rolling = sum(p * q for p, q in zip(self.ob.trade_prices, self.ob.trade_quantities))
+        self.assertAlmostEqual(rolling / (sum(self.ob.trade_quantities) * PRICE_SCALE), sum(prices) / window)
+
+    def test_matches_reference_book(self):
+        rng = random.Random(1805)
+        bids, asks = {}, {}
+        volume = notional = 0
+        for _ in range(2000):
+            price = rng.randint(95, 105)
+            quantity = rng.randint(0, 20)
+            is_buy = rng.random() < 0.5
+            self.submit(price, quantity, is_buy)
+
+            # Naive price-time reference book
+            opposite = asks if is_buy else bids
+            for level_price in sorted(opposite, reverse=not is_buy):
+                if quantity == 0 or (level_price > price if is_buy else level_price < price):
+                    break
+                queue = opposite[level_price]
+                while quantity and queue:
+                    traded = min(quantity, queue[0])
+                    quantity -= traded
+                    queue[0] -= traded
+                    volume += traded
+                    notional += traded * ticks(level_price)
+                    if queue[0] == 0:
+                        queue.pop(0)
+                if not queue:
+                    del opposite[level_price]
+            if quantity:
+                (bids if is_buy else asks).setdefault(price, []).append(quantity)
+
+            self.assertEqual(self.ob.total_volume_traded, volume)
+            self.assertEqual(self.ob.cumulative_notional, notional)
+        self.assertEqual(self.resting(self.ob.bids), {float(p): q for p, q in bids.items()})
+        self.assertEqual(self.resting(self.ob.asks), {float(p): q for p, q in asks.items()})
+
+
+class ParseFixedTest(unittest.TestCase):
+    def test_truncates_by_default(self):
+        self.assertEqual(parse_fixed("0.00199999", 3), 1)
+        self.assertEqual(parse_fixed("1.001", 3), 1001)
+        self.assertEqual(parse_fixed("12", 3), 12000)
+
+    def test_round_half_up(self):
+        self.assertEqual(parse_fixed("67000.12000000", 2, round_half_up=True), 6700012)
+        self.assertEqual(parse_fixed("0.125", 2, round_half_up=True), 13)
+        self.assertEqual(parse_fixed("0.12499", 2, round_half_up=True), 12)
+        self.assertEqual(parse_fixed("9.995", 2, round_half_up=True), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()